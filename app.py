@@ -1,8 +1,13 @@
+import os
+import shutil
+import threading
 from flask import Flask
 from flask_login import LoginManager
 from config import Config
 from models.database import db, init_db, User
 from core.auth_service import AuthService
+from core.file_manager_service import sweep_trash
+from core.json_provider import OrjsonProvider
 from routes.auth import auth_bp
 from routes.dashboard import dashboard_bp
 from routes.api import api_bp
@@ -13,6 +18,10 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Serialize jsonify() responses and parse request bodies with orjson
+    app.json_provider_class = OrjsonProvider
+    app.json = OrjsonProvider(app)
+    
     # Initialize database
     init_db(app)
     
@@ -35,6 +44,9 @@ def create_app():
     app.register_blueprint(dashboard_bp)
     app.register_blueprint(api_bp)
     
+    # Finish removing deleted folders an earlier run did not get to
+    threading.Thread(target=sweep_trash, name='trash-sweep', daemon=True).start()
+    
     return app
 
 
@@ -56,4 +68,17 @@ if __name__ == '__main__':
     print(f"\n🚀 Starting server at http://{Config.HOST}:{Config.PORT}")
     print("\n")
     
-    app.run(host=Config.HOST, port=Config.PORT, debug=Config.DEBUG)
+    if Config.DEBUG:
+        app.run(host=Config.HOST, port=Config.PORT, debug=True)
+    elif shutil.which('gunicorn'):
+        # Production: hand over to gunicorn with threaded, preforked workers
+        os.execvp('gunicorn', [
+            'gunicorn',
+            '--chdir', str(Config.BASE_DIR),
+            '-c', str(Config.BASE_DIR / 'gunicorn_conf.py'),
+            'app:create_app()'
+        ])
+    else:
+        print("⚠️  gunicorn not found, falling back to the development server.")
+        print("   For production run: gunicorn -c gunicorn_conf.py \"app:create_app()\"")
+        app.run(host=Config.HOST, port=Config.PORT, threaded=True)
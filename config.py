@@ -13,6 +13,13 @@ class Config:
     DEBUG = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
     APP_VERSION = os.getenv('APP_VERSION', 'v0.1')
     
+    # Let a front server that supports X-Sendfile (Apache, lighttpd) send
+    # downloaded files itself instead of streaming them through Python
+    USE_X_SENDFILE = os.getenv('USE_X_SENDFILE', 'False').lower() == 'true'
+    
+    # Reject oversized uploads before the multipart body is parsed and spooled
+    MAX_CONTENT_LENGTH = int(os.getenv('MAX_UPLOAD_SIZE_MB', '1024')) * 1024 * 1024
+    
     # Database
     BASE_DIR = Path(__file__).parent
     STORAGE_DIR = BASE_DIR / 'storage'
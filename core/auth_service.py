@@ -1,12 +1,66 @@
+import os
+import hmac
+import time
+import hashlib
+import threading
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.orm import make_transient_to_detached
 from werkzeug.security import check_password_hash
-from models.database import User
+from models.database import db, User
 
 
 class AuthService:
     """Service for user authentication"""
     
-    @staticmethod
-    def verify_user(username: str, password: str) -> User:
+    # Seconds a loaded user is reused by get_user_by_id before re-querying
+    USER_CACHE_TTL = 60
+    
+    # user_id -> (expires_at, column values)
+    _user_cache: Dict[int, Tuple[float, Dict]] = {}
+    
+    # Seconds a successful password check is remembered
+    PASSWORD_CACHE_TTL = 30
+    
+    # HMAC of (stored hash, password) -> expires_at. The key is random per
+    # process, so entries cannot be used to test passwords anywhere else.
+    _password_cache: Dict[str, float] = {}
+    _password_cache_key = os.urandom(32)
+    
+    # Guards the expiry sweep against logins inserting from other threads
+    _password_cache_lock = threading.Lock()
+    
+    @classmethod
+    def _check_password(cls, user: User, password: str) -> bool:
+        """
+        Check a password against the user's hash
+        
+        Successful checks are remembered briefly so repeated logins skip the
+        deliberately slow hash. Failures are never cached, and a new stored
+        hash (password change) produces a different cache key.
+        """
+        probe = hmac.new(
+            cls._password_cache_key,
+            f"{user.password}\0{password}".encode(),
+            hashlib.sha256
+        ).hexdigest()
+        
+        now = time.monotonic()
+        if cls._password_cache.get(probe, 0) > now:
+            return True
+        
+        if not check_password_hash(user.password, password):
+            return False
+        
+        with cls._password_cache_lock:
+            # Drop expired entries so the cache stays small
+            for key in [k for k, expires in cls._password_cache.items() if expires <= now]:
+                del cls._password_cache[key]
+            cls._password_cache[probe] = now + cls.PASSWORD_CACHE_TTL
+        return True
+    
+    @classmethod
+    def verify_user(cls, username: str, password: str) -> User:
         """
         Verify user credentials
         
@@ -17,14 +71,38 @@ class AuthService:
         Returns:
             User object if credentials are valid, None otherwise
         """
-        user = User.query.filter_by(username=username).first()
+        user = db.session.scalar(select(User).where(User.username == username).limit(1))
         
-        if user and check_password_hash(user.password, password):
+        if user and cls._check_password(user, password):
             return user
         
         return None
     
-    @staticmethod
-    def get_user_by_id(user_id: int) -> User:
-        """Get user by ID"""
-        return User.query.get(int(user_id))
+    @classmethod
+    def get_user_by_id(cls, user_id: int) -> Optional[User]:
+        """
+        Get user by ID
+        
+        Flask-Login calls this on every authenticated request, so users are
+        kept in a short-lived in-process cache and re-attached to the current
+        session without a query.
+        """
+        user_id = int(user_id)
+        
+        cached = cls._user_cache.get(user_id)
+        if cached and cached[0] > time.monotonic():
+            user = User(**cached[1])
+            make_transient_to_detached(user)
+            return db.session.merge(user, load=False)
+        
+        # Session.get returns an already-loaded user from the identity map
+        user = db.session.get(User, user_id)
+        if user:
+            cls._user_cache[user_id] = (
+                time.monotonic() + cls.USER_CACHE_TTL,
+                {'id': user.id, 'username': user.username, 'password': user.password}
+            )
+        else:
+            cls._user_cache.pop(user_id, None)
+        
+        return user
@@ -1,24 +1,58 @@
 import os
+import re
 import platform
+import functools
 import requests
 import zipfile
 import shutil
+import tempfile
+import threading
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 from config import Config
 from core.github_service import GitHubService
+from core.http_session import SESSION
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# PocketBase release versions; anything else is rejected before it is
+# used in a path
+VERSION_RE = re.compile(r'^\d+\.\d+\.\d+$')
+
+# Per-version locks so concurrent requests for a version download it once
+_download_locks: Dict[str, threading.Lock] = {}
+_download_locks_guard = threading.Lock()
 
 
 class DownloadService:
     """Service to download and manage PocketBase binaries"""
     
+    # Read downloads in 1MB chunks and keep archives up to 64MB in memory
+    CHUNK_SIZE = 1 << 20
+    SPOOL_MAX_SIZE = 64 << 20
+    
+    # Interrupted downloads are resumed with Range requests this many times
+    MAX_RESUME_ATTEMPTS = 3
+    
+    # Errors after which a download can be resumed where it stopped
+    RESUMABLE_ERRORS = (
+        requests.exceptions.ConnectionError,
+        requests.exceptions.ChunkedEncodingError,
+        requests.exceptions.Timeout
+    )
+    
     def __init__(self):
         self.downloads_dir = Config.DOWNLOADS_DIR
         self.github_service = GitHubService()
     
     @staticmethod
+    @functools.lru_cache(maxsize=1)
     def detect_os() -> str:
-        """Detect current operating system"""
+        """Detect current operating system (computed once per process)"""
         system = platform.system().lower()
         if system == 'linux':
             return 'linux'
@@ -29,9 +63,11 @@ class DownloadService:
         else:
             raise Exception(f"Unsupported operating system: {system}")
     
-    def get_executable_name(self) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def get_executable_name() -> str:
         """Get PocketBase executable name based on OS"""
-        os_type = self.detect_os()
+        os_type = DownloadService.detect_os()
         if os_type == 'windows':
             return 'pocketbase.exe'
         return 'pocketbase'
@@ -54,6 +90,9 @@ class DownloadService:
         Returns:
             Path to downloaded executable
         """
+        if not VERSION_RE.match(version):
+            raise Exception(f"Invalid version: {version}")
+        
         if os_type is None:
             os_type = self.detect_os()
         
@@ -66,37 +105,64 @@ class DownloadService:
             print(f"✓ Version {version} already downloaded")
             return exe_path
         
-        # Get download URL
+        # Only released versions get a lock (and a lock file)
         download_url = self.github_service.get_download_url(version, os_type)
         if not download_url:
             raise Exception(f"No download URL found for version {version} and OS {os_type}")
         
+        with self._version_lock(version):
+            # Another request may have finished this download while we waited
+            if exe_path.exists():
+                print(f"✓ Version {version} already downloaded")
+                return exe_path
+            
+            return self._download_and_extract(version, os_type, download_url, exe_path)
+    
+    @contextmanager
+    def _version_lock(self, version: str):
+        """Serialize downloads of the same version across threads and worker processes"""
+        with _download_locks_guard:
+            thread_lock = _download_locks.setdefault(version, threading.Lock())
+        
+        # The lock file lives outside the version directory, which is removed on failure
+        with thread_lock, open(self.downloads_dir / f".{version}.lock", 'w') as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+    
+    def _download_and_extract(self, version: str, os_type: str, download_url: str, exe_path: Path) -> Path:
+        """Download a release archive and extract its executable to exe_path"""
+        version_dir = exe_path.parent
+        exe_name = exe_path.name
+        
         # Create version directory
         version_dir.mkdir(parents=True, exist_ok=True)
         
         # Download file
         print(f"Downloading PocketBase v{version} for {os_type}...")
-        zip_path = version_dir / 'pocketbase.zip'
         
         try:
-            response = requests.get(download_url, stream=True, timeout=300)
-            response.raise_for_status()
-            
-            with open(zip_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            # Extract ZIP
-            print(f"Extracting...")
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(version_dir)
-            
-            # Remove ZIP file
-            zip_path.unlink()
+            # Buffer the archive in memory (spilling to disk only for unusually
+            # large files) and extract the executable straight from it
+            with tempfile.SpooledTemporaryFile(max_size=self.SPOOL_MAX_SIZE) as buffer:
+                self._download_to(download_url, buffer)
+                buffer.seek(0)
+                
+                # Extract ZIP to a temporary name; the executable only appears
+                # under exe_path once it is complete, so other requests and
+                # workers (and later runs after a crash) never pick up a
+                # partly written binary
+                print(f"Extracting...")
+                tmp_path = version_dir / f".{exe_name}.{os.getpid()}.tmp"
+                with zipfile.ZipFile(buffer, 'r') as zip_ref:
+                    with zip_ref.open(exe_name) as src, open(tmp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, self.CHUNK_SIZE)
             
             # Make executable (Unix systems)
             if os_type in ['linux', 'darwin']:
-                os.chmod(exe_path, 0o755)
+                os.chmod(tmp_path, 0o755)
+            
+            os.replace(tmp_path, exe_path)
             
             print(f"✓ PocketBase v{version} downloaded successfully")
             return exe_path
@@ -107,6 +173,55 @@ class DownloadService:
                 shutil.rmtree(version_dir)
             raise Exception(f"Failed to download PocketBase: {e}")
     
+    @staticmethod
+    def _get_content_length(url: str) -> Optional[int]:
+        """Get the size of a remote file with a HEAD request, if available"""
+        try:
+            response = SESSION.head(url, allow_redirects=True, timeout=10,
+                                    headers={'Accept-Encoding': 'identity'})
+            response.raise_for_status()
+            return int(response.headers['Content-Length'])
+        except (requests.exceptions.RequestException, KeyError, ValueError):
+            return None
+    
+    def _download_to(self, url: str, buffer) -> None:
+        """
+        Stream a remote file into buffer
+        
+        If the connection drops mid-transfer, the download resumes from the
+        bytes already received using an HTTP Range request.
+        """
+        total = self._get_content_length(url)
+        attempts = 0
+        
+        while True:
+            received = buffer.tell()
+            # Range offsets only make sense on the raw, unencoded bytes
+            headers = {'Accept-Encoding': 'identity'}
+            if received:
+                headers['Range'] = f'bytes={received}-'
+            
+            try:
+                with SESSION.get(url, headers=headers, stream=True, timeout=300) as response:
+                    response.raise_for_status()
+                    
+                    # Server ignored the range, start over
+                    if received and response.status_code != 206:
+                        buffer.seek(0)
+                        buffer.truncate()
+                    
+                    for chunk in response.iter_content(chunk_size=self.CHUNK_SIZE):
+                        buffer.write(chunk)
+                break
+            except self.RESUMABLE_ERRORS as e:
+                attempts += 1
+                if attempts > self.MAX_RESUME_ATTEMPTS:
+                    raise
+                print(f"Download interrupted ({e}), resuming at {buffer.tell()} bytes...")
+        
+        if total is not None and buffer.tell() != total:
+            raise Exception(f"Incomplete download: got {buffer.tell()} of {total} bytes")
+    
     def get_executable_path(self, version: str) -> Optional[Path]:
         """Get path to executable for specific version"""
         version_dir = self.downloads_dir / version
@@ -1,9 +1,93 @@
+import io
 import os
 import shutil
+import functools
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
-from datetime import datetime
+from typing import List, Dict, Optional, Tuple
 from werkzeug.utils import secure_filename
+from config import Config
+
+# Background workers removing deleted folders outside the request
+_DELETE_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix='file-delete')
+
+# Deleted folders are renamed in here and removed in the background. It sits
+# next to the instances (same filesystem, so the rename is atomic) but outside
+# every instance tree, so nothing users can name is ever swept.
+TRASH_DIR = Config.INSTANCES_DIR / '.trash'
+
+# Workers writing the files of a multi-file upload side by side
+_UPLOAD_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix='file-upload')
+
+
+def _remove_tree(path: Path) -> None:
+    """Remove a folder tree, logging failures (the next sweep retries it)"""
+    try:
+        shutil.rmtree(path)
+    except FileNotFoundError:
+        # Already removed, e.g. by another process's sweep
+        pass
+    except OSError as e:
+        print(f"⚠ Failed to remove {path}: {e}")
+
+
+def move_to_trash(path: Path) -> None:
+    """
+    Make a folder disappear immediately and remove its files in the background
+    
+    Args:
+        path: Folder to remove
+    """
+    trash_path = TRASH_DIR / uuid.uuid4().hex
+    try:
+        TRASH_DIR.mkdir(exist_ok=True)
+        os.rename(path, trash_path)
+    except OSError:
+        # E.g. the folder is on another filesystem; remove it in place
+        shutil.rmtree(path)
+        return
+    
+    _DELETE_POOL.submit(_remove_tree, trash_path)
+
+
+def sweep_trash() -> None:
+    """
+    Remove folders left in the trash by an earlier run
+    
+    Runs synchronously and without the pool, so it can be started on a
+    plain thread before gunicorn forks its workers.
+    """
+    try:
+        with os.scandir(TRASH_DIR) as it:
+            leftovers = [Path(e.path) for e in it]
+    except OSError:
+        return
+    
+    for path in leftovers:
+        print(f"Removing leftover {path}")
+        _remove_tree(path)
+
+
+def _resolve_path(instance_path: str, relative_path: str) -> Path:
+    """Resolve a relative path inside an instance directory"""
+    # Remove leading slashes and resolve
+    clean_path = relative_path.lstrip('/')
+    full_path = Path(instance_path, clean_path).resolve()
+    
+    # Ensure path is within instance directory
+    try:
+        full_path.relative_to(instance_path)
+    except ValueError:
+        raise ValueError("Invalid path: directory traversal detected")
+    
+    return full_path
+
+
+# Memoized resolution, only used for listings. It is cleared whenever this
+# process mutates the tree, but other gunicorn workers keep their entries,
+# so paths that are written to or downloaded are always resolved afresh.
+_resolve_path_cached = functools.lru_cache(maxsize=1024)(_resolve_path)
 
 
 class FileManagerService:
@@ -12,9 +96,15 @@ class FileManagerService:
     # Files that should be protected (warnings shown)
     PROTECTED_FILES = {'pocketbase', 'run.sh', 'pb_data/data.db', 'pb_data/data.db-shm', 'pb_data/data.db-wal'}
     
+    # Tuple form for str.startswith, which checks all prefixes in one C call
+    _PROTECTED_PREFIXES = tuple(PROTECTED_FILES)
+    
     # Maximum file size (100MB)
     MAX_FILE_SIZE = 100 * 1024 * 1024
     
+    # Buffer size for stream copies (1MB)
+    COPY_BUFFER_SIZE = 1024 * 1024
+    
     def __init__(self, instance_path: str):
         """
         Initialize file manager for a specific instance
@@ -23,16 +113,18 @@ class FileManagerService:
             instance_path: Absolute path to the instance directory
         """
         self.instance_path = Path(instance_path).resolve()
+        self._instance_path_str = str(self.instance_path)
         
         if not self.instance_path.exists():
             raise ValueError(f"Instance path does not exist: {instance_path}")
     
-    def _validate_path(self, relative_path: str) -> Path:
+    def _validate_path(self, relative_path: str, cached: bool = False) -> Path:
         """
         Validate and resolve a path, preventing directory traversal
         
         Args:
             relative_path: Relative path within instance directory
+            cached: Reuse an earlier resolution (read-only listings only)
             
         Returns:
             Resolved absolute path
@@ -43,17 +135,9 @@ class FileManagerService:
         if not relative_path:
             return self.instance_path
         
-        # Remove leading slashes and resolve
-        clean_path = relative_path.lstrip('/')
-        full_path = (self.instance_path / clean_path).resolve()
-        
-        # Ensure path is within instance directory
-        try:
-            full_path.relative_to(self.instance_path)
-        except ValueError:
-            raise ValueError("Invalid path: directory traversal detected")
-        
-        return full_path
+        if cached:
+            return _resolve_path_cached(self._instance_path_str, relative_path)
+        return _resolve_path(self._instance_path_str, relative_path)
     
     def _get_relative_path(self, full_path: Path) -> str:
         """Get relative path from instance root"""
@@ -64,9 +148,64 @@ class FileManagerService:
     
     def _is_protected(self, relative_path: str) -> bool:
         """Check if a file is protected"""
-        return relative_path in self.PROTECTED_FILES or any(
-            relative_path.startswith(pf) for pf in self.PROTECTED_FILES
+        # An exact match is also a prefix match
+        return relative_path.startswith(self._PROTECTED_PREFIXES)
+    
+    @classmethod
+    @functools.lru_cache(maxsize=256)
+    def _protected_in_directory(cls, dir_prefix: str) -> Tuple[bool, Tuple[str, ...]]:
+        """
+        Narrow the protected prefixes to those relevant for one directory
+        
+        Args:
+            dir_prefix: Relative directory path with trailing slash ('' for root)
+            
+        Returns:
+            Tuple of (everything in the directory is protected, name prefixes
+            to check entries against). Most directories get (False, ()), so
+            listing them costs no per-item work however many prefixes exist.
+        """
+        if dir_prefix.startswith(cls._PROTECTED_PREFIXES):
+            return True, ()
+        
+        name_prefixes = tuple(
+            pf[len(dir_prefix):] for pf in cls._PROTECTED_PREFIXES if pf.startswith(dir_prefix)
         )
+        return False, name_prefixes
+    
+    def _copy_stream(self, source, dest, size: int) -> None:
+        """
+        Copy an uploaded stream into an open file
+        
+        Uses os.sendfile when the upload is spooled to a real file so the
+        copy happens in the kernel, otherwise a buffered userspace copy.
+        """
+        # fileno() on an in-memory SpooledTemporaryFile writes it out to a
+        # temp file first, so only take the sendfile path once it is on disk
+        source_fd = None
+        if getattr(source, '_rolled', True):
+            try:
+                source_fd = source.fileno()
+            except (AttributeError, OSError, io.UnsupportedOperation):
+                pass
+        
+        if source_fd is not None and hasattr(os, 'sendfile'):
+            try:
+                offset = source.tell()
+                dest.flush()
+                while offset < size:
+                    sent = os.sendfile(dest.fileno(), source_fd, offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+                return
+            except OSError:
+                # Not supported for this file pair, fall back to a buffered copy
+                source.seek(0)
+                dest.seek(0)
+                dest.truncate()
+        
+        shutil.copyfileobj(source, dest, length=self.COPY_BUFFER_SIZE)
     
     def list_directory(self, path: str = "") -> Dict:
         """
@@ -76,10 +215,11 @@ class FileManagerService:
             path: Relative path within instance
             
         Returns:
-            Dictionary with files and folders information
+            Dictionary with files and folders information as parallel
+            lists (names, types, sizes, mtimes, protected), one entry per item
         """
         try:
-            full_path = self._validate_path(path)
+            full_path = self._validate_path(path, cached=True)
             
             if not full_path.exists():
                 raise FileNotFoundError(f"Path does not exist: {path}")
@@ -87,31 +227,42 @@ class FileManagerService:
             if not full_path.is_dir():
                 raise ValueError(f"Path is not a directory: {path}")
             
-            items = []
+            current_path = self._get_relative_path(full_path)
+            # Items at the root have no prefix ('.' is the root itself)
+            prefix = '' if full_path == self.instance_path else current_path + '/'
             
-            for item in sorted(full_path.iterdir(), key=lambda x: (not x.is_dir(), x.name.lower())):
-                relative = self._get_relative_path(item)
-                stat = item.stat()
-                
-                item_info = {
-                    'name': item.name,
-                    'path': relative,
-                    'type': 'directory' if item.is_dir() else 'file',
-                    'size': stat.st_size if item.is_file() else 0,
-                    'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-                    'protected': self._is_protected(relative)
-                }
-                
-                # Add extension for files
-                if item.is_file():
-                    item_info['extension'] = item.suffix.lower()
+            # scandir returns file types with the listing and caches stat()
+            # per entry, so each item costs at most one stat syscall
+            with os.scandir(full_path) as it:
+                entries = sorted(it, key=lambda e: (not e.is_dir(), e.name.lower()))
+            
+            all_protected, protected_names = self._protected_in_directory(prefix)
+            
+            # Columns instead of one dict per item keeps large listings cheap
+            # to build and serialize; the frontend zips them back together
+            names = []
+            types = []
+            sizes = []
+            mtimes = []
+            protected = []
+            
+            for entry in entries:
+                stat = entry.stat()
                 
-                items.append(item_info)
+                names.append(entry.name)
+                types.append('directory' if entry.is_dir() else 'file')
+                sizes.append(stat.st_size if entry.is_file() else 0)
+                mtimes.append(stat.st_mtime)
+                protected.append(all_protected or entry.name.startswith(protected_names))
             
             return {
                 'success': True,
-                'current_path': self._get_relative_path(full_path),
-                'items': items
+                'current_path': current_path,
+                'names': names,
+                'types': types,
+                'sizes': sizes,
+                'mtimes': mtimes,
+                'protected': protected
             }
         
         except Exception as e:
@@ -144,6 +295,7 @@ class FileManagerService:
                 raise ValueError(f"Folder already exists: {safe_name}")
             
             new_folder.mkdir(parents=True, exist_ok=False)
+            _resolve_path_cached.cache_clear()
             
             return {
                 'success': True,
@@ -180,11 +332,14 @@ class FileManagerService:
             relative = self._get_relative_path(full_path)
             
             if full_path.is_dir():
-                shutil.rmtree(full_path)
+                # Rename atomically so the folder disappears immediately, then
+                # remove the (possibly large) tree in the background
+                move_to_trash(full_path)
                 item_type = "Folder"
             else:
                 full_path.unlink()
                 item_type = "File"
+            _resolve_path_cached.cache_clear()
             
             return {
                 'success': True,
@@ -223,8 +378,10 @@ class FileManagerService:
                 shutil.copytree(source, dest)
                 item_type = "Folder"
             else:
-                shutil.copy2(source, dest)
+                # copy2 on real paths uses the kernel fast path (sendfile/copy_file_range)
+                shutil.copy2(source, dest, follow_symlinks=False)
                 item_type = "File"
+            _resolve_path_cached.cache_clear()
             
             return {
                 'success': True,
@@ -264,6 +421,7 @@ class FileManagerService:
                 raise ValueError("Cannot move instance root directory")
             
             shutil.move(str(source), str(dest))
+            _resolve_path_cached.cache_clear()
             
             return {
                 'success': True,
@@ -312,7 +470,8 @@ class FileManagerService:
             
             # Save file
             with open(file_path, 'wb') as f:
-                shutil.copyfileobj(file_data, f)
+                self._copy_stream(file_data, f, file_size)
+            _resolve_path_cached.cache_clear()
             
             return {
                 'success': True,
@@ -327,6 +486,41 @@ class FileManagerService:
                 'error': str(e)
             }
     
+    def save_files(self, path: str, files: List, replace: bool = True) -> List[Dict]:
+        """
+        Save several uploaded files, writing them concurrently
+        
+        Args:
+            path: Directory path
+            files: File objects from request (those without a filename are skipped)
+            replace: Whether to replace existing files
+            
+        Returns:
+            One success/error dictionary per saved file, in upload order
+        """
+        files = [f for f in files if f.filename]
+        
+        # Parts saved under the same name are written one after another in
+        # upload order, so the last one wins just as with sequential saves
+        groups: Dict[str, List[int]] = {}
+        for index, file in enumerate(files):
+            groups.setdefault(secure_filename(file.filename), []).append(index)
+        
+        results: List[Optional[Dict]] = [None] * len(files)
+        
+        def save_group(indexes: List[int]) -> None:
+            for index in indexes:
+                results[index] = self.save_file(path, files[index].filename, files[index], replace)
+        
+        if len(groups) <= 1:
+            for indexes in groups.values():
+                save_group(indexes)
+        else:
+            # Consume the iterator so worker exceptions are raised here
+            list(_UPLOAD_POOL.map(save_group, groups.values()))
+        
+        return results
+    
     def get_file_path(self, path: str) -> Path:
         """
         Get the absolute file path for downloading
@@ -339,10 +533,10 @@ class FileManagerService:
         """
         full_path = self._validate_path(path)
         
-        if not full_path.exists():
-            raise FileNotFoundError(f"File does not exist: {path}")
-        
+        # One stat for the common case; tell the errors apart only on failure
         if not full_path.is_file():
+            if not full_path.exists():
+                raise FileNotFoundError(f"File does not exist: {path}")
             raise ValueError(f"Path is not a file: {path}")
         
         return full_path
@@ -1,18 +1,96 @@
-import requests
+import os
 import time
+import orjson
 import platform
+import re
+import threading
 from typing import List, Dict, Optional
 from config import Config
+from core.http_session import SESSION
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Release asset platforms we can install, matched in a single regex pass
+ASSET_PLATFORM_RE = re.compile(r'(linux_(?:amd|arm)64|darwin_(?:amd|arm)64|windows_amd64)', re.IGNORECASE)
+ASSET_PLATFORM_COUNT = 5
+
+# The releases JSON compresses well, so always ask for gzip (requests decodes it)
+API_HEADERS = {
+    'Accept': 'application/vnd.github+json',
+    'Accept-Encoding': 'gzip'
+}
 
 class GitHubService:
     """Service to interact with GitHub API for PocketBase releases"""
     
+    # Cache state is shared by all instances: routes and DownloadService
+    # create a new GitHubService per call, so per-instance state never hits
+    _cache = None
+    _cache_time = 0
+    _etag = None
+    _last_modified = None
+    _refresh_lock = threading.Lock()
+    
+    # Unix time until which GitHub told us to stop calling (rate limited)
+    _rate_limited_until = 0
+    
     def __init__(self):
         self.api_url = Config.GITHUB_API_URL
         self.cache_duration = Config.GITHUB_CACHE_DURATION
-        self._cache = None
-        self._cache_time = 0
+        self.cache_file = Config.STORAGE_DIR / 'github_releases.json'
+    
+    @classmethod
+    def _set_cache(cls, releases: Optional[List[Dict]], fetched_at: float,
+                   etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Update the process-wide releases cache"""
+        cls._cache = releases
+        cls._cache_time = fetched_at
+        cls._etag = etag
+        cls._last_modified = last_modified
+    
+    def _is_fresh(self) -> bool:
+        """Check if cached releases are still within the cache duration"""
+        return bool(self._cache) and (time.time() - self._cache_time) < self.cache_duration
+    
+    def _load_disk_cache(self) -> None:
+        """Load releases persisted by this or another worker process"""
+        try:
+            with open(self.cache_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        except (OSError, orjson.JSONDecodeError):
+            return
+        
+        if data.get('fetched_at', 0) > self._cache_time:
+            self._set_cache(
+                data.get('payload'),
+                data.get('fetched_at', 0),
+                data.get('etag'),
+                data.get('last_modified')
+            )
+    
+    def _save_disk_cache(self) -> None:
+        """Persist releases so other workers and restarts can reuse them"""
+        data = {
+            'fetched_at': self._cache_time,
+            'etag': self._etag,
+            'last_modified': self._last_modified,
+            'payload': self._cache
+        }
+        tmp_path = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+        lock_path = self.cache_file.with_name(f"{self.cache_file.name}.lock")
+        
+        try:
+            with open(lock_path, 'w') as lock_file:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                with open(tmp_path, 'wb') as f:
+                    f.write(orjson.dumps(data))
+                os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Failed to write releases cache: {e}")
     
     def get_releases(self, force_refresh: bool = False) -> List[Dict]:
         """
@@ -20,13 +98,68 @@ class GitHubService:
         Returns list of releases with version and download URLs
         """
         # Check cache
-        if not force_refresh and self._cache and (time.time() - self._cache_time) < self.cache_duration:
+        if not force_refresh and self._is_fresh():
+            return self._cache
+        
+        # Serve expired releases right away and revalidate them in the
+        # background, so page loads never wait on GitHub once data exists
+        if not force_refresh and self._cache:
+            if self._refresh_lock.acquire(blocking=False):
+                threading.Thread(
+                    target=self._refresh_in_background,
+                    name='github-releases-refresh',
+                    daemon=True
+                ).start()
             return self._cache
         
+        # Only one thread refreshes; the others wait and reuse its result
+        with self._refresh_lock:
+            # Another thread or worker may have refreshed the cache meanwhile
+            self._load_disk_cache()
+            if not force_refresh and self._is_fresh():
+                return self._cache
+            
+            return self._fetch_releases()
+    
+    def _refresh_in_background(self) -> None:
+        """Refresh expired releases; the caller already holds _refresh_lock"""
+        try:
+            self._load_disk_cache()
+            if not self._is_fresh():
+                self._fetch_releases()
+        finally:
+            self._refresh_lock.release()
+    
+    def _fetch_releases(self) -> List[Dict]:
+        """Fetch releases from GitHub, revalidating the cached copy if any"""
+        # Requests made while rate limited fail and only delay the reset
+        if time.time() < self._rate_limited_until:
+            return self._cache or []
+        
         try:
-            response = requests.get(self.api_url, timeout=10)
+            # Revalidate instead of refetching when we already have data
+            headers = dict(API_HEADERS)
+            if self._cache:
+                if self._etag:
+                    headers['If-None-Match'] = self._etag
+                if self._last_modified:
+                    headers['If-Modified-Since'] = self._last_modified
+            
+            response = SESSION.get(self.api_url, headers=headers, timeout=10)
+            
+            if response.status_code == 304 and self._cache:
+                self._set_cache(self._cache, time.time(), self._etag, self._last_modified)
+                self._save_disk_cache()
+                return self._cache
+            
+            if response.status_code in (403, 429) and response.headers.get('X-RateLimit-Remaining') == '0':
+                reset_at = int(response.headers.get('X-RateLimit-Reset', 0))
+                type(self)._rate_limited_until = reset_at
+                print(f"GitHub rate limit exceeded, using cached releases until {time.ctime(reset_at)}")
+                return self._cache or []
+            
             response.raise_for_status()
-            releases_data = response.json()
+            releases_data = orjson.loads(response.content)
             
             releases = []
             for release in releases_data:
@@ -39,20 +172,12 @@ class GitHubService:
                 
                 assets: Dict[str, str] = {}
                 for asset in release.get('assets', []):
-                    name = asset.get('name', '').lower()
-                    download_url = asset.get('browser_download_url')
-                    
                     # Keep full OS+arch information so we can pick the right binary later
-                    if 'linux_amd64' in name:
-                        assets['linux_amd64'] = download_url
-                    elif 'linux_arm64' in name:
-                        assets['linux_arm64'] = download_url
-                    elif 'darwin_amd64' in name:
-                        assets['darwin_amd64'] = download_url
-                    elif 'darwin_arm64' in name:
-                        assets['darwin_arm64'] = download_url
-                    elif 'windows_amd64' in name:
-                        assets['windows_amd64'] = download_url
+                    match = ASSET_PLATFORM_RE.search(asset.get('name', ''))
+                    if match:
+                        assets[match.group(1).lower()] = asset.get('browser_download_url')
+                        if len(assets) == ASSET_PLATFORM_COUNT:
+                            break
                 
                 if assets:
                     releases.append({
@@ -63,8 +188,13 @@ class GitHubService:
                     })
             
             # Update cache
-            self._cache = releases
-            self._cache_time = time.time()
+            self._set_cache(
+                releases,
+                time.time(),
+                response.headers.get('ETag'),
+                response.headers.get('Last-Modified')
+            )
+            self._save_disk_cache()
             
             return releases
         
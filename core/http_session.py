@@ -0,0 +1,30 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+
+def create_session() -> requests.Session:
+    """
+    Create an HTTP session with keep-alive connection pooling and retries
+
+    Reusing one session avoids a new TCP + TLS handshake for every
+    GitHub API call and release download.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        max_retries=Retry(total=3, backoff_factor=0.3, status_forcelist=(502, 503, 504))
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({
+        'Accept-Encoding': 'gzip',
+        'User-Agent': f'pb-manager/{Config.APP_VERSION}'
+    })
+    return session
+
+
+# Shared session used by all services
+SESSION = create_session()
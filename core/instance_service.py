@@ -1,42 +1,136 @@
+import os
 import shutil
 import re
 import subprocess
 import sqlite3
+from contextlib import closing
 from pathlib import Path
 from typing import List, Optional, Dict
+from sqlalchemy import func, or_
 from config import Config
 from models.database import db
 from models.instance import Instance
 from core.download_service import DownloadService
 from core.pm2_service import PM2Service
+from core.file_manager_service import move_to_trash
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl request to clone file extents (btrfs, xfs, ...), from linux/fs.h
+FICLONE = 0x40049409
+
+# Patterns used by sanitize_name
+_RE_NONWORD = re.compile(r'[^\w\-]')
+_RE_UNDERS = re.compile(r'_+')
+
+# run.sh used by PM2 to start an instance
+_RUN_SH_TEMPLATE = '''#!/bin/bash
+set -e  # Exit on any error
+
+# PocketBase Instance Runner
+# Instance: {name}
+# Version: {version}
+# Port: {port}
+# Dev Mode: {dev_mode}
+
+cd "{dir}"
+
+# Check if pocketbase executable exists
+if [ ! -f "./pocketbase" ]; then
+    echo "Error: pocketbase executable not found in $(pwd)"
+    exit 1
+fi
+
+exec "./pocketbase" serve \\
+    --http "0.0.0.0:{port}" \\
+    --dir "{dir}/pb_data" \\
+    --hooksDir "{dir}/pb_hooks" \\
+    --migrationsDir "{dir}/pb_migrations" \\
+    --publicDir "{dir}/pb_public" \\
+    {dev_flag}
+'''
 
 
 class InstanceService:
     """Service to manage PocketBase instances"""
     
+    # Directories PocketBase expects inside each instance directory
+    INSTANCE_SUBDIRS = ('pb_hooks', 'pb_migrations', 'pb_data', 'pb_public')
+    
     def __init__(self):
         self.instances_dir = Config.INSTANCES_DIR
         self.download_service = DownloadService()
         self.pm2_service = PM2Service()
+        
+        # Constant for the process, look them up once
+        self._exe_name = self.download_service.get_executable_name()
+        self._is_unix = self.download_service.detect_os() in ('linux', 'darwin')
     
     @staticmethod
     def sanitize_name(name: str) -> str:
         """Sanitize instance name to be filesystem-safe"""
         # Replace spaces and special chars with underscore
-        name = re.sub(r'[^\w\-]', '_', name)
+        name = _RE_NONWORD.sub('_', name)
         # Remove multiple underscores
-        name = re.sub(r'_+', '_', name)
+        name = _RE_UNDERS.sub('_', name)
         # Convert to lowercase
         return name.lower().strip('_')
     
+    @staticmethod
+    def _install_executable(src: Path, dst: Path) -> None:
+        """
+        Place the downloaded PocketBase binary in an instance directory
+        
+        Uses a copy-on-write clone on filesystems that support it, and a
+        regular copy otherwise. No hardlink: the file manager writes files in
+        place, so a linked binary would be shared with the download cache.
+        """
+        if fcntl:
+            try:
+                with open(src, 'rb') as src_file, open(dst, 'wb') as dst_file:
+                    fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+                return
+            except OSError:
+                pass
+        
+        shutil.copyfile(src, dst)
+    
+    @staticmethod
+    def _write_run_script(instance_dir: Path, name: str, version: str, port: int, dev_mode: bool) -> None:
+        """Write the executable run.sh script for an instance"""
+        run_script_path = instance_dir / 'run.sh'
+        run_script_path.write_text(_RUN_SH_TEMPLATE.format(
+            name=name,
+            version=version,
+            port=port,
+            dev_mode=dev_mode,
+            dir=instance_dir,
+            dev_flag='--dev' if dev_mode else ''
+        ))
+        
+        # Make script executable
+        os.chmod(run_script_path, 0o755)
+    
+    @staticmethod
+    def _remove_dir(path: Path) -> None:
+        """
+        Remove an instance directory without waiting for the whole tree
+        
+        The directory is moved to the trash first, so the instance name is
+        free again immediately, and the files are deleted in the background.
+        """
+        move_to_trash(path)
+    
     def get_next_available_port(self) -> int:
         """Get next available port starting from DEFAULT_PORT_START"""
-        instances = Instance.query.order_by(Instance.port.desc()).all()
+        highest_port = db.session.query(func.max(Instance.port)).scalar()
         
-        if not instances:
+        if highest_port is None:
             return Config.DEFAULT_PORT_START
         
-        highest_port = instances[0].port
         return max(highest_port + 1, Config.DEFAULT_PORT_START)
     
     def create_superuser(self, instance_path: Path, admin_email: str, admin_password: str) -> bool:
@@ -52,8 +146,7 @@ class InstanceService:
             True if successful, False otherwise
         """
         try:
-            exe_name = self.download_service.get_executable_name()
-            exe_path = instance_path / exe_name
+            exe_path = instance_path / self._exe_name
             
             if not exe_path.exists():
                 raise Exception(f"PocketBase executable not found: {exe_path}")
@@ -95,32 +188,25 @@ class InstanceService:
             return []
         
         try:
-            conn = sqlite3.connect(str(db_path))
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            # Query _superusers table (PocketBase internal table for admins)
-            # Exclude system installer account
-            cursor.execute("""
-                SELECT id, email, created, updated, verified, emailVisibility
-                FROM _superusers 
-                WHERE email != '__pbinstaller@example.com'
-                ORDER BY created DESC
-            """)
-            
-            admins = []
-            for row in cursor.fetchall():
-                admins.append({
-                    'id': row['id'],
-                    'email': row['email'],
-                    'created': row['created'],
-                    'updated': row['updated'],
-                    'verified': row['verified'],
-                    'emailVisibility': row['emailVisibility']
-                })
-            
-            conn.close()
-            return admins
+            with closing(sqlite3.connect(str(db_path))) as conn:
+                # Query _superusers table (PocketBase internal table for admins)
+                # Exclude system installer account
+                cursor = conn.execute("""
+                    SELECT id, email, created, updated, verified, emailVisibility
+                    FROM _superusers 
+                    WHERE email != '__pbinstaller@example.com'
+                    ORDER BY created DESC
+                """)
+                
+                # Column order is fixed by the SELECT above
+                return [{
+                    'id': row[0],
+                    'email': row[1],
+                    'created': row[2],
+                    'updated': row[3],
+                    'verified': row[4],
+                    'emailVisibility': row[5]
+                } for row in cursor.fetchall()]
         
         except Exception as e:
             raise Exception(f"Failed to list admins: {e}")
@@ -147,6 +233,19 @@ class InstanceService:
             instance_path: Path to instance directory
             admin_id: Admin user ID to remove
             
+        Returns:
+            True if successful
+        """
+        return self.remove_admins(instance_path, [admin_id])
+    
+    def remove_admins(self, instance_path: Path, admin_ids: List[str]) -> bool:
+        """
+        Remove several admin users from PocketBase instance in one transaction
+        
+        Args:
+            instance_path: Path to instance directory
+            admin_ids: Admin user IDs to remove
+            
         Returns:
             True if successful
         """
@@ -155,31 +254,56 @@ class InstanceService:
         if not db_path.exists():
             raise Exception("Database not found")
         
+        admin_ids = list(dict.fromkeys(admin_ids))
+        if not admin_ids:
+            return True
+        
+        placeholders = ','.join('?' * len(admin_ids))
+        
         try:
-            # Check if there's more than one admin
-            admins = self.list_admins(instance_path)
-            if len(admins) <= 1:
-                raise Exception("Cannot delete the last admin user")
-            
-            conn = sqlite3.connect(str(db_path))
-            cursor = conn.cursor()
-            
-            # Delete from _superusers table
-            cursor.execute("DELETE FROM _superusers WHERE id = ?", (admin_id,))
-            
-            if cursor.rowcount == 0:
-                conn.close()
-                raise Exception(f"Admin not found: {admin_id}")
-            
-            conn.commit()
-            conn.close()
-            
-            print(f"✓ Admin removed: {admin_id}")
+            with closing(sqlite3.connect(str(db_path))) as conn:
+                cursor = conn.cursor()
+                
+                # Check that at least one admin remains afterwards
+                cursor.execute(
+                    f"SELECT COUNT(*) FROM _superusers WHERE email != '__pbinstaller@example.com' AND id NOT IN ({placeholders})",
+                    admin_ids
+                )
+                if cursor.fetchone()[0] < 1:
+                    raise Exception("Cannot delete the last admin user")
+                
+                # Delete from _superusers table
+                cursor.execute(f"DELETE FROM _superusers WHERE id IN ({placeholders})", admin_ids)
+                
+                # Nothing is committed unless every admin was found
+                if cursor.rowcount < len(admin_ids):
+                    if len(admin_ids) == 1:
+                        raise Exception(f"Admin not found: {admin_ids[0]}")
+                    raise Exception(f"{len(admin_ids) - cursor.rowcount} of {len(admin_ids)} admins not found")
+                
+                conn.commit()
+            
+            print(f"✓ Admin removed: {', '.join(admin_ids)}")
             return True
         
         except Exception as e:
             raise Exception(f"Failed to remove admin: {e}")
     
+    def resolved_exe_path(self, instance: Instance) -> Optional[str]:
+        """
+        Get the path of an instance's PocketBase executable
+        
+        Args:
+            instance: Instance to look up
+            
+        Returns:
+            Executable path, or None if it is missing
+        """
+        # Checked on every call: the binary can be removed through the file
+        # manager or replaced by another worker at any time
+        exe_path = os.path.join(instance.pb_path, self._exe_name)
+        return exe_path if os.path.exists(exe_path) else None
+    
     def update_version(self, instance_id: int, new_version: str) -> bool:
         """
         Update PocketBase version for an instance
@@ -196,28 +320,27 @@ class InstanceService:
             raise Exception(f"Instance with ID {instance_id} not found")
         
         # Check if instance is stopped
-        if self.pm2_service.is_running(instance.pm2_name):
+        if self.pm2_service.is_running(instance.pm2_name, instance.pb_path):
             raise Exception("Instance must be stopped before changing version")
         
         # Setup paths
         instance_dir = Path(instance.pb_path)
-        exe_name = self.download_service.get_executable_name()
-        instance_exe = instance_dir / exe_name
-        backup_exe = instance_dir / f"{exe_name}.backup"
+        instance_exe = instance_dir / self._exe_name
+        backup_exe = instance_dir / f"{self._exe_name}.backup"
         
         try:
             # Download new version
             exe_path = self.download_service.download_version(new_version)
             
+            # Move the old binary aside (a rename, no data is read)
             if instance_exe.exists():
-                shutil.copy2(instance_exe, backup_exe)
+                os.replace(instance_exe, backup_exe)
             
-            # Copy new executable
-            shutil.copy2(exe_path, instance_exe)
+            # Install new executable
+            self._install_executable(exe_path, instance_exe)
             
             # Make executable (Unix systems)
-            if self.download_service.detect_os() in ['linux', 'darwin']:
-                import os
+            if self._is_unix:
                 os.chmod(instance_exe, 0o755)
             
             # Update version in database
@@ -233,9 +356,8 @@ class InstanceService:
         
         except Exception as e:
             # Restore backup if it exists
-            if backup_exe.exists() and instance_exe.exists():
-                shutil.copy2(backup_exe, instance_exe)
-                backup_exe.unlink()
+            if backup_exe.exists():
+                os.replace(backup_exe, instance_exe)
             db.session.rollback()
             raise Exception(f"Failed to update version: {e}")
     
@@ -284,14 +406,17 @@ class InstanceService:
         # Sanitize name
         sanitized_name = self.sanitize_name(name)
         
-        # Check if name already exists
-        if Instance.query.filter_by(name=sanitized_name).first():
-            raise Exception(f"Instance with name '{sanitized_name}' already exists")
-        
         # Get port
         if port is None:
             port = self.get_next_available_port()
-        elif Instance.query.filter_by(port=port).first():
+        
+        # Check name and port availability in a single query
+        existing = db.session.query(Instance.name, Instance.port).filter(
+            or_(Instance.name == sanitized_name, Instance.port == port)
+        ).first()
+        if existing:
+            if existing.name == sanitized_name:
+                raise Exception(f"Instance with name '{sanitized_name}' already exists")
             raise Exception(f"Port {port} is already in use")
         
         # Download PocketBase if needed
@@ -308,56 +433,19 @@ class InstanceService:
         try:
             instance_dir.mkdir(parents=True, exist_ok=True)
             
-            # Create PocketBase directories
-            (instance_dir / 'pb_hooks').mkdir(exist_ok=True)
-            (instance_dir / 'pb_migrations').mkdir(exist_ok=True)
-            (instance_dir / 'pb_data').mkdir(exist_ok=True)
-            (instance_dir / 'pb_public').mkdir(exist_ok=True)
+            # Create PocketBase directories (the instance directory is new)
+            for subdir in self.INSTANCE_SUBDIRS:
+                (instance_dir / subdir).mkdir()
             
             # Create run.sh script
-            run_script_path = instance_dir / 'run.sh'
-            dev_flag = '--dev' if dev_mode else ''
-            run_script_content = f'''#!/bin/bash
-set -e  # Exit on any error
-
-# PocketBase Instance Runner
-# Instance: {sanitized_name}
-# Version: {version}
-# Port: {port}
-# Dev Mode: {dev_mode}
-
-cd "{instance_dir}"
-
-# Check if pocketbase executable exists
-if [ ! -f "./pocketbase" ]; then
-    echo "Error: pocketbase executable not found in $(pwd)"
-    exit 1
-fi
-
-exec "./pocketbase" serve \\
-    --http "0.0.0.0:{port}" \\
-    --dir "{instance_dir}/pb_data" \\
-    --hooksDir "{instance_dir}/pb_hooks" \\
-    --migrationsDir "{instance_dir}/pb_migrations" \\
-    --publicDir "{instance_dir}/pb_public" \\
-    {dev_flag}
-'''
-            
-            with open(run_script_path, 'w') as f:
-                f.write(run_script_content)
-            
-            # Make script executable
-            import os
-            os.chmod(run_script_path, 0o755)
+            self._write_run_script(instance_dir, sanitized_name, version, port, dev_mode)
             
             # Copy executable
-            exe_name = self.download_service.get_executable_name()
-            instance_exe = instance_dir / exe_name
-            shutil.copy2(exe_path, instance_exe)
+            instance_exe = instance_dir / self._exe_name
+            self._install_executable(exe_path, instance_exe)
             
             # Make executable (Unix systems)
-            if self.download_service.detect_os() in ['linux', 'darwin']:
-                import os
+            if self._is_unix:
                 os.chmod(instance_exe, 0o755)
             
             # Create instance in database
@@ -391,7 +479,7 @@ exec "./pocketbase" serve \\
         except Exception as e:
             # Cleanup on error
             if instance_dir.exists():
-                shutil.rmtree(instance_dir)
+                self._remove_dir(instance_dir)
             db.session.rollback()
             raise Exception(f"Failed to create instance: {e}")
     
@@ -423,44 +511,10 @@ exec "./pocketbase" serve \\
     
     def regenerate_run_script(self, instance):
         """Regenerate run.sh script for an existing instance"""
-        from pathlib import Path
-        import os
-        
-        instance_dir = Path(instance.pb_path)
-        run_script_path = instance_dir / 'run.sh'
-        
-        dev_flag = '--dev' if instance.dev_mode else ''
-        run_script_content = f'''#!/bin/bash
-set -e  # Exit on any error
-
-# PocketBase Instance Runner
-# Instance: {instance.name}
-# Version: {instance.version}
-# Port: {instance.port}
-# Dev Mode: {instance.dev_mode}
-
-cd "{instance_dir}"
-
-# Check if pocketbase executable exists
-if [ ! -f "./pocketbase" ]; then
-    echo "Error: pocketbase executable not found in $(pwd)"
-    exit 1
-fi
-
-exec "./pocketbase" serve \\
-    --http "0.0.0.0:{instance.port}" \\
-    --dir "{instance_dir}/pb_data" \\
-    --hooksDir "{instance_dir}/pb_hooks" \\
-    --migrationsDir "{instance_dir}/pb_migrations" \\
-    --publicDir "{instance_dir}/pb_public" \\
-    {dev_flag}
-'''
-        
-        with open(run_script_path, 'w') as f:
-            f.write(run_script_content)
-        
-        # Make script executable
-        os.chmod(run_script_path, 0o755)
+        self._write_run_script(
+            Path(instance.pb_path), instance.name, instance.version,
+            instance.port, instance.dev_mode
+        )
     
     def delete_instance(self, instance_id: int, remove_files: bool = True) -> bool:
         """
@@ -479,7 +533,7 @@ exec "./pocketbase" serve \\
         
         try:
             # Stop and delete from PM2 if running
-            if self.pm2_service.is_running(instance.pm2_name):
+            if self.pm2_service.is_running(instance.pm2_name, instance.pb_path):
                 self.pm2_service.stop_instance(instance.pm2_name)
             
             self.pm2_service.delete_instance(instance.pm2_name)
@@ -488,7 +542,7 @@ exec "./pocketbase" serve \\
             if remove_files:
                 instance_dir = Path(instance.pb_path)
                 if instance_dir.exists():
-                    shutil.rmtree(instance_dir)
+                    self._remove_dir(instance_dir)
                     print(f"✓ Removed instance directory: {instance_dir}")
             
             # Delete from database
@@ -503,14 +557,25 @@ exec "./pocketbase" serve \\
             raise Exception(f"Failed to delete instance: {e}")
     
     def get_instances_with_status(self) -> List[Dict]:
-        """Get all instances with their PM2 status"""
-        instances = self.get_all_instances()
+        """
+        Get all instances with their PM2 status
+        
+        Uses one SQL query and one `pm2 jlist` call for all instances, joined
+        in memory by pm2_name.
+        """
+        # Select plain column tuples, no ORM objects are needed for a read-only listing
+        rows = db.session.query(
+            Instance.id, Instance.name, Instance.version, Instance.port,
+            Instance.pm2_name, Instance.pb_path, Instance.dev_mode,
+            Instance.domain, Instance.created_at
+        ).order_by(Instance.created_at.desc()).all()
         pm2_statuses = self.pm2_service.get_all_status()
         
         result = []
-        for instance in instances:
-            instance_data = instance.to_dict()
-            pm2_status = pm2_statuses.get(instance.pm2_name, {})
+        for row in rows:
+            instance_data = row._asdict()
+            instance_data['created_at'] = row.created_at.isoformat() if row.created_at else None
+            pm2_status = pm2_statuses.get(row.pm2_name, {})
             instance_data['pm2_status'] = pm2_status.get('status', 'stopped')
             instance_data['pid'] = pm2_status.get('pid')
             instance_data['cpu'] = pm2_status.get('cpu', 0)
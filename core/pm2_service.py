@@ -1,16 +1,59 @@
+import os
 import json
+import time
+import orjson
+import threading
 import subprocess
-from typing import Dict, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from config import Config
+
+# Runs `pm2 save` after process changes without holding up the request
+_SAVE_POOL = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pm2-save')
 
 
 class PM2Service:
     """Service to interact with PM2 process manager"""
     
+    # Seconds a `pm2 jlist` result is reused, so bursts of status checks
+    # share one subprocess
+    STATUS_CACHE_TTL = 0.5
+    
+    PM2_HOME = os.getenv('PM2_HOME', os.path.expanduser('~/.pm2'))
+    
+    # PM2 keeps one `<name>-<pm_id>.pid` file here per running process
+    PIDS_DIR = os.path.join(PM2_HOME, 'pids')
+    
+    # Default location of `<name>-out.log` and `<name>-error.log`
+    LOGS_DIR = os.path.join(PM2_HOME, 'logs')
+    
+    # Bytes read for the initial log view, and at most per incremental read
+    LOG_TAIL_BYTES = 64 * 1024
+    LOG_READ_LIMIT = 1024 * 1024
+    
+    # A `pm2 save` is queued and hasn't started yet
+    _save_pending = False
+    _save_lock = threading.Lock()
+    
+    def __init__(self):
+        self._status_cache = None
+        self._status_ts = 0.0
+    
+    def _invalidate_status(self) -> None:
+        """Drop cached status after an action that changes process state"""
+        self._status_ts = 0.0
+    
     @staticmethod
-    def _run_command(command: List[str]) -> tuple:
+    def _run_command(command: List[str], text: bool = True) -> tuple:
         """
         Run PM2 command and return output
         
+        Args:
+            command: Command and arguments
+            text: Decode output to str (False returns stdout/stderr as bytes)
+        
         Returns:
             Tuple of (success: bool, output: str, error: str)
         """
@@ -18,7 +61,7 @@ class PM2Service:
             result = subprocess.run(
                 command,
                 capture_output=True,
-                text=True,
+                text=text,
                 timeout=30
             )
             return (result.returncode == 0, result.stdout, result.stderr)
@@ -33,6 +76,24 @@ class PM2Service:
             print(f"Failed to save PM2 configuration: {stderr}")
         return success
     
+    def save_in_background(self) -> None:
+        """
+        Queue a `pm2 save` on a background thread
+        
+        Saves run one at a time, and requests made while one is still queued
+        share it, since a single save captures the latest process list.
+        """
+        with self._save_lock:
+            if PM2Service._save_pending:
+                return
+            PM2Service._save_pending = True
+        _SAVE_POOL.submit(self._run_queued_save)
+    
+    def _run_queued_save(self) -> None:
+        with self._save_lock:
+            PM2Service._save_pending = False
+        self.save()
+    
     def start_instance(self, name: str, executable_path: str, port: int, data_dir: str) -> bool:
         """
         Start PocketBase instance with PM2 using run.sh script
@@ -50,7 +111,6 @@ class PM2Service:
         run_script_path = f"{data_dir}/run.sh"
         
         # Check if run.sh exists (for migration purposes)
-        from pathlib import Path
         if not Path(run_script_path).exists():
             raise Exception(f"run.sh script not found. This instance needs to be recreated to use the new script-based startup system.")
         
@@ -62,15 +122,55 @@ class PM2Service:
         ]
         
         success, stdout, stderr = self._run_command(command)
+        self._invalidate_status()
         if not success:
             print(f"Failed to start instance: {stderr}")
             return False
-        self.save()
+        self.save_in_background()
+        return True
+    
+    def sync_all(self, instances: List) -> bool:
+        """
+        Start several instances with a single PM2 call
+        
+        Writes an ecosystem file listing every instance's run.sh and hands it
+        to `pm2 start`, so the PM2 CLI is launched once instead of once per
+        instance. Instances that are already running are left alone.
+        
+        Args:
+            instances: Instance objects to start (those without run.sh are skipped)
+        
+        Returns:
+            True if successful
+        """
+        apps = [{
+            'name': instance.pm2_name,
+            'script': f"{instance.pb_path}/run.sh",
+            'cwd': instance.pb_path,
+            'time': True
+        } for instance in instances if Path(instance.pb_path, 'run.sh').exists()]
+        
+        if not apps:
+            return True
+        
+        ecosystem_path = Config.INSTANCES_DIR / 'ecosystem.config.js'
+        ecosystem_path.write_text(f"module.exports = {json.dumps({'apps': apps}, indent=2)};\n")
+        
+        success, stdout, stderr = self._run_command([
+            'pm2', 'start', str(ecosystem_path),
+            '--only', ','.join(app['name'] for app in apps)
+        ])
+        self._invalidate_status()
+        if not success:
+            print(f"Failed to start instances: {stderr}")
+            return False
+        self.save_in_background()
         return True
     
     def stop_instance(self, pm2_name: str) -> bool:
         """Stop PM2 process"""
         success, stdout, stderr = self._run_command(['pm2', 'stop', pm2_name])
+        self._invalidate_status()
         if not success:
             print(f"Failed to stop instance: {stderr}")
         return success
@@ -78,17 +178,37 @@ class PM2Service:
     def restart_instance(self, pm2_name: str) -> bool:
         """Restart PM2 process"""
         success, stdout, stderr = self._run_command(['pm2', 'restart', pm2_name])
+        self._invalidate_status()
         if not success:
             print(f"Failed to restart instance: {stderr}")
         return success
     
+    def restart_if_running(self, pm2_name: str, instance_dir: Optional[str] = None) -> bool:
+        """
+        Restart a PM2 process only if it is currently online
+        
+        The state check reads PM2's pid files (or one cached jlist), so a
+        stopped instance costs no PM2 call at all.
+        
+        Args:
+            pm2_name: PM2 process name
+            instance_dir: Instance directory, needed to trust the pid files
+        
+        Returns:
+            True if the process was running and restarted
+        """
+        if not self.is_running(pm2_name, instance_dir):
+            return False
+        return self.restart_instance(pm2_name)
+    
     def delete_instance(self, pm2_name: str) -> bool:
         """Delete PM2 process"""
         success, stdout, stderr = self._run_command(['pm2', 'delete', pm2_name])
+        self._invalidate_status()
         if not success:
             print(f"Failed to delete instance: {stderr}")
             return False
-        self.save()
+        self.save_in_background()
         return True
     
     def get_all_status(self) -> Dict[str, Dict]:
@@ -98,14 +218,20 @@ class PM2Service:
         Returns:
             Dict with pm2_name as key and status info as value
         """
-        success, stdout, stderr = self._run_command(['pm2', 'jlist'])
+        if self._status_cache is not None and time.monotonic() - self._status_ts < self.STATUS_CACHE_TTL:
+            return self._status_cache
+        
+        # orjson parses the raw bytes directly, no need to decode them first
+        success, stdout, stderr = self._run_command(['pm2', 'jlist'], text=False)
         
         if not success:
+            if isinstance(stderr, bytes):
+                stderr = stderr.decode(errors='replace')
             print(f"Failed to get PM2 status: {stderr}")
             return {}
         
         try:
-            processes = json.loads(stdout)
+            processes = orjson.loads(stdout)
             status_map = {}
             
             for proc in processes:
@@ -121,8 +247,10 @@ class PM2Service:
                     'restarts': pm2_env.get('restart_time', 0)
                 }
             
+            self._status_cache = status_map
+            self._status_ts = time.monotonic()
             return status_map
-        except json.JSONDecodeError:
+        except orjson.JSONDecodeError:
             print("Failed to parse PM2 jlist output")
             return {}
     
@@ -142,20 +270,204 @@ class PM2Service:
         Returns:
             Log output as string
         """
-        success, stdout, stderr = self._run_command([
+        command = [
             'pm2', 'logs', pm2_name,
             '--lines', str(lines),
             '--nostream'
             # Note: --time flag is set during startup, not needed here
-        ])
+        ]
         
-        if not success:
-            return f"Failed to get logs: {stderr}"
+        # pm2 prints up to `lines` lines from both the out and error logs plus
+        # a header for each; stream its output and keep only that much
+        tail = deque(maxlen=2 * lines + 8)
         
-        return stdout
+        try:
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True
+            )
+        except Exception as e:
+            return f"Failed to get logs: {e}"
+        
+        # Drain stderr alongside stdout; left unread, a full stderr pipe
+        # would block pm2 until the timer kills it
+        stderr_chunks = []
+        stderr_reader = threading.Thread(
+            target=lambda: stderr_chunks.append(process.stderr.read()),
+            daemon=True
+        )
+        
+        timer = threading.Timer(30, process.kill)
+        timer.start()
+        stderr_reader.start()
+        try:
+            for line in process.stdout:
+                tail.append(line)
+            returncode = process.wait()
+            stderr_reader.join()
+            stderr = ''.join(stderr_chunks)
+        finally:
+            timer.cancel()
+            process.stdout.close()
+            process.stderr.close()
+        
+        if returncode != 0:
+            return f"Failed to get logs: {stderr or 'Command timeout'}"
+        
+        return ''.join(tail)
+    
+    def _is_running_from_pid_file(self, pm2_name: str, instance_dir: str) -> Optional[bool]:
+        """
+        Check whether a process is running from PM2's pid files
+        
+        Pid files left over from a reboot or a PM2 daemon crash may name a pid
+        that now belongs to another process, so a pid only counts if its
+        command line mentions the instance directory (run.sh and the
+        pocketbase it execs both do).
+        
+        Args:
+            pm2_name: PM2 process name
+            instance_dir: Instance directory
+        
+        Returns:
+            True/False, or None if the pid files can't be used (fall back to jlist)
+        """
+        # Command lines are read from /proc (Linux)
+        if not os.path.isdir('/proc/self'):
+            return None
+        
+        try:
+            entries = os.listdir(self.PIDS_DIR)
+        except OSError:
+            return None
+        
+        prefix = f"{pm2_name}-"
+        # Trailing separator, so /x/app doesn't match /x/app2
+        needle = os.path.join(instance_dir, '').encode()
+        for entry in entries:
+            # Match "<name>-<pm_id>.pid" exactly, not other names sharing the prefix
+            if not (entry.startswith(prefix) and entry.endswith('.pid') and entry[len(prefix):-4].isdigit()):
+                continue
+            try:
+                with open(os.path.join(self.PIDS_DIR, entry)) as f:
+                    pid = int(f.read().strip())
+                with open(f"/proc/{pid}/cmdline", 'rb') as f:
+                    cmdline = f.read()
+            except PermissionError:
+                # /proc is restricted (hidepid); can't tell whose pid it is
+                return None
+            except (OSError, ValueError):
+                # Stale pid file: no such process
+                continue
+            
+            if needle in cmdline:
+                return True
+        
+        return False
+    
+    def _read_log_file(self, path: str, offset: Optional[int], lines: int) -> Tuple[str, int]:
+        """
+        Read complete lines from a log file
+        
+        Args:
+            path: Log file path
+            offset: Byte offset to continue from (None for the last `lines` lines)
+            lines: Number of lines for the initial read
+        
+        Returns:
+            Tuple of (text, offset to continue from next time)
+        """
+        try:
+            with open(path, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                
+                # First read, a bogus offset, or the log was truncated/rotated
+                # since the last one
+                tail = offset is None or offset < 0 or offset > size
+                if tail:
+                    start = max(0, size - self.LOG_TAIL_BYTES)
+                else:
+                    start = max(offset, size - self.LOG_READ_LIMIT)
+                
+                f.seek(start)
+                data = f.read(size - start)
+        except FileNotFoundError:
+            return '', 0
+        
+        # Leave an unfinished last line for the next read, and skip a partial
+        # first line when the read didn't start at a line boundary
+        end = data.rfind(b'\n') + 1
+        skip = data.find(b'\n') + 1 if start > 0 and start != offset else 0
+        text = data[min(skip, end):end].decode(errors='replace')
+        
+        if tail:
+            text = ''.join(text.splitlines(keepends=True)[-lines:])
+        
+        return text, start + end
     
-    def is_running(self, pm2_name: str) -> bool:
-        """Check if instance is running"""
+    def read_logs(self, pm2_name: str, lines: int = 100, since: Optional[str] = None) -> Optional[Dict]:
+        """
+        Read an instance's logs straight from PM2's log files
+        
+        Args:
+            pm2_name: PM2 process name
+            lines: Number of lines per log for the initial read
+            since: `next_offset` from a previous call, to get only new output
+        
+        Returns:
+            Dict with `logs` and `next_offset`, or None if the log files
+            aren't found (use get_logs instead)
+        """
+        paths = [
+            os.path.join(self.LOGS_DIR, f"{pm2_name}-error.log"),
+            os.path.join(self.LOGS_DIR, f"{pm2_name}-out.log")
+        ]
+        if not any(os.path.exists(path) for path in paths):
+            return None
+        
+        # `since` holds one offset per log file; anything else means start over
+        offsets = (None, None)
+        if since:
+            try:
+                offsets = tuple(int(value) for value in since.split(','))
+            except ValueError:
+                pass
+            if len(offsets) != 2:
+                offsets = (None, None)
+        incremental = offsets[0] is not None
+        
+        chunks = []
+        next_offsets = []
+        for path, offset in zip(paths, offsets):
+            text, next_offset = self._read_log_file(path, offset, lines)
+            next_offsets.append(str(next_offset))
+            if not incremental:
+                # Same layout as `pm2 logs --nostream`
+                chunks.append(f"{path} last {lines} lines:\n")
+            chunks.append(text)
+        
+        return {'logs': ''.join(chunks), 'next_offset': ','.join(next_offsets)}
+    
+    def is_running(self, pm2_name: str, instance_dir: Optional[str] = None) -> bool:
+        """
+        Check if instance is running
+        
+        Args:
+            pm2_name: PM2 process name
+            instance_dir: Instance directory; without it PM2's pid files
+                can't be validated and jlist is asked instead
+        
+        Returns:
+            True if the process is online
+        """
+        # Read PM2's pid files first to avoid spawning the PM2 CLI
+        if instance_dir:
+            running = self._is_running_from_pid_file(pm2_name, instance_dir)
+            if running is not None:
+                return running
+        
         status = self.get_instance_status(pm2_name)
         if status:
             return status.get('status') == 'online'
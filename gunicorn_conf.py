@@ -0,0 +1,44 @@
+"""Gunicorn configuration for running PocketBase Manager in production
+
+Usage:
+    gunicorn -c gunicorn_conf.py "app:create_app()"
+"""
+import os
+import sys
+import multiprocessing
+
+# gunicorn reads this file before applying --chdir, so make the project
+# importable when started from another directory
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config import Config
+
+# Import the app from the project directory whatever the current directory is
+chdir = BASE_DIR
+
+bind = f"{Config.HOST}:{Config.PORT}"
+
+# Threaded workers so slow GitHub calls and downloads don't block other users
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.getenv('GUNICORN_THREADS', '8'))
+
+# PocketBase downloads can take a while on slow links
+timeout = 300
+
+# Load the app once in the master so workers share its memory image
+preload_app = True
+
+
+def post_worker_init(worker):
+    """Give each worker its own database and HTTP connections instead of the master's"""
+    from models.database import db
+    from core.http_session import SESSION
+    with worker.wsgi.app_context():
+        db.engine.dispose(close=False)
+    
+    # Don't share keep-alive sockets the master may have opened while loading
+    # the app; the session opens fresh ones on its next request
+    SESSION.close()
@@ -1,6 +1,6 @@
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-import sqlite3
+from sqlalchemy import event
 
 db = SQLAlchemy()
 
@@ -17,19 +17,34 @@ class User(UserMixin, db.Model):
         return f'<User {self.username}>'
 
 
+def configure_sqlite():
+    """Enable WAL and lighter fsync settings for the SQLite database"""
+    @event.listens_for(db.engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        # Per-connection settings: WAL makes NORMAL sync safe against corruption
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.close()
+    
+    # journal_mode is stored in the database file, so setting it once is enough
+    conn = db.engine.raw_connection()
+    try:
+        conn.cursor().execute("PRAGMA journal_mode=WAL")
+    finally:
+        conn.close()
+
+
 def migrate_database(app):
     """Run database migrations for schema changes"""
-    from pathlib import Path
-    
-    db_path = Path(app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', ''))
-    
-    if not db_path.exists():
-        return
+    conn = db.engine.raw_connection()
     
     try:
-        conn = sqlite3.connect(str(db_path))
         cursor = conn.cursor()
         
+        # Run all schema changes in one transaction (a single fsync)
+        cursor.execute("BEGIN")
+        
         # Check if domain column exists in instances table
         cursor.execute("PRAGMA table_info(instances)")
         columns = [row[1] for row in cursor.fetchall()]
@@ -37,12 +52,14 @@ def migrate_database(app):
         if 'domain' not in columns:
             print("🔄 Adding 'domain' column to instances table...")
             cursor.execute("ALTER TABLE instances ADD COLUMN domain VARCHAR(255)")
-            conn.commit()
             print("✅ Migration completed: 'domain' column added")
         
-        conn.close()
+        conn.commit()
     except Exception as e:
+        conn.rollback()
         print(f"⚠️  Migration warning: {e}")
+    finally:
+        conn.close()
 
 
 def init_db(app):
@@ -50,6 +67,7 @@ def init_db(app):
     db.init_app(app)
     
     with app.app_context():
+        configure_sqlite()
         db.create_all()
         migrate_database(app)
         
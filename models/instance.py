@@ -6,6 +6,8 @@ class Instance(db.Model):
     """PocketBase instance model"""
     __tablename__ = 'instances'
     
+    # The unique constraints on name, port and pm2_name each come with an
+    # index, which also serves MAX(port) and the name/port availability check
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False)
     version = db.Column(db.String(20), nullable=False)
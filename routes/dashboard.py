@@ -5,14 +5,15 @@ from core.github_service import GitHubService
 
 dashboard_bp = Blueprint('dashboard', __name__)
 
+# Services hold no per-request state, so one set is shared by all requests
+instance_service = InstanceService()
+github_service = GitHubService()
+
 
 @dashboard_bp.route('/')
 @login_required
 def index():
     """Main dashboard page"""
-    instance_service = InstanceService()
-    github_service = GitHubService()
-    
     # Get instances with status
     instances = instance_service.get_instances_with_status()
     
@@ -1,6 +1,8 @@
 // Dashboard functionality
 
 let currentLogsInstanceId = null;
+let logsOffset = null; // Cursor returned by the logs API for incremental refreshes
+const LOGS_LINES = 200; // Lines requested per log file, and kept per file in the view
 let refreshInterval = null;
 const REFRESH_RATE = 2000; // 2 seconds
 
@@ -89,6 +91,7 @@ function closeLogsModal() {
     document.getElementById('logsModal').classList.add('hidden');
     document.getElementById('logsModal').classList.remove('flex');
     currentLogsInstanceId = null;
+    logsOffset = null;
 }
 
 // Change domain
@@ -412,6 +415,7 @@ async function toggleDevMode(id) {
 // View logs
 async function viewLogs(id) {
     currentLogsInstanceId = id;
+    logsOffset = null;
     const modal = document.getElementById('logsModal');
     modal.classList.remove('hidden');
     modal.classList.add('flex');
@@ -423,7 +427,9 @@ async function loadLogs() {
     if (!currentLogsInstanceId) return;
     
     try {
-        const response = await fetch(`/api/instances/${currentLogsInstanceId}/logs?lines=200`);
+        // After the first load, only ask for output written since then
+        const sinceParam = logsOffset ? `&since=${encodeURIComponent(logsOffset)}` : '';
+        const response = await fetch(`/api/instances/${currentLogsInstanceId}/logs?lines=${LOGS_LINES}${sinceParam}`);
         const result = await response.json();
         
         if (result.success) {
@@ -431,7 +437,17 @@ async function loadLogs() {
             // Preserve scroll position if at bottom
             const isAtBottom = logsContent.scrollHeight - logsContent.scrollTop === logsContent.clientHeight;
             
-            logsContent.textContent = result.logs || 'No logs available';
+            if (logsOffset && result.next_offset) {
+                if (result.logs) {
+                    // Keep the view bounded like the initial load: LOGS_LINES
+                    // lines for each of the error and output logs
+                    const lines = (logsContent.textContent + result.logs).split('\n');
+                    logsContent.textContent = lines.slice(-(2 * LOGS_LINES + 1)).join('\n');
+                }
+            } else {
+                logsContent.textContent = result.logs || 'No logs available';
+            }
+            logsOffset = result.next_offset || null;
             
             if (isAtBottom) {
                 logsContent.scrollTop = logsContent.scrollHeight;
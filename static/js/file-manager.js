@@ -41,7 +41,7 @@ async function loadFiles() {
         const result = await response.json();
         
         if (result.success) {
-            renderFileList(result.items, result.current_path);
+            renderFileList(zipFileColumns(result), result.current_path);
             updateBreadcrumb(result.current_path);
             updateToolbar();
         } else {
@@ -52,6 +52,26 @@ async function loadFiles() {
     }
 }
 
+// Build item objects from the columnar listing returned by the API
+function zipFileColumns(result) {
+    const prefix = result.current_path === '.' ? '' : `${result.current_path}/`;
+    
+    return result.names.map((name, i) => {
+        const type = result.types[i];
+        const dot = name.lastIndexOf('.');
+        
+        return {
+            name: name,
+            path: prefix + name,
+            type: type,
+            size: result.sizes[i],
+            modified: result.mtimes[i] * 1000,
+            protected: result.protected[i],
+            extension: type === 'file' && dot > 0 ? name.slice(dot).toLowerCase() : ''
+        };
+    });
+}
+
 // Render file list
 function renderFileList(items, currentPathStr) {
     const container = document.getElementById('fileList');